@@ -0,0 +1,280 @@
+import os
+import sys
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Chargement rapide des sessions enregistrées par web_app.py (colonne eeg_pure)
+# et csv_eeg.py, avec index d'horodatage et conversion en Parquet.
+
+INDEX_SUFFIX = '.idx.npz'
+INDEX_STRIDE = 1000  # Une entrée d'index toutes les INDEX_STRIDE lignes
+CHUNK_SIZE = 50000
+EEG_COLUMN = 'eeg_pure'
+TEXT_COLUMNS = (EEG_COLUMN, 'brain_state')
+
+def decode_eeg_pure(series):
+    # Décode une colonne de listes texte ("[512, 498, ...]") sans literal_eval :
+    # toutes les cellules sont concaténées puis converties en un seul appel numpy.
+    text = series.fillna('').astype(str).str.strip('[] ')
+    lengths = np.where(text.str.len().to_numpy() == 0, 0, text.str.count(',').to_numpy() + 1)
+    non_empty = text[lengths > 0]
+    if len(non_empty) == 0:
+        values = np.empty(0, dtype=np.float64)
+    else:
+        values = np.array(','.join(non_empty).split(','), dtype=np.float64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    if offsets[-1] != len(values):
+        raise ValueError("Colonne eeg_pure mal formée : nombre de valeurs incohérent.")
+    return values, offsets
+
+def eeg_pure_to_array(series):
+    # Renvoie une matrice (lignes x échantillons) si toutes les fenêtres ont la
+    # même taille, sinon une liste de tableaux.
+    if len(series) == 0:
+        return np.empty((0, 0), dtype=np.float64)
+    values, offsets = decode_eeg_pure(series)
+    lengths = np.diff(offsets)
+    if len(lengths) > 0 and np.all(lengths == lengths[0]):
+        return values.reshape(len(lengths), lengths[0])
+    return np.split(values, offsets[1:-1])
+
+def _prepare_chunk(chunk, decode_eeg, to_datetime):
+    if decode_eeg and EEG_COLUMN in chunk.columns:
+        chunk[EEG_COLUMN] = list(eeg_pure_to_array(chunk[EEG_COLUMN]))
+    if to_datetime and 'timestamp' in chunk.columns:
+        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], unit='s')
+    return chunk
+
+def iter_session(filename, chunksize=CHUNK_SIZE, usecols=None, decode_eeg=True, to_datetime=False):
+    # Parcourt un fichier de session par blocs de `chunksize` lignes.
+    reader = pd.read_csv(filename, chunksize=chunksize, usecols=usecols)
+    for chunk in reader:
+        yield _prepare_chunk(chunk, decode_eeg, to_datetime)
+
+def load_session(filename, chunksize=CHUNK_SIZE, usecols=None, decode_eeg=True, to_datetime=True):
+    # Équivalent de pd.read_csv + pd.to_datetime utilisé dans TEST_ML.ipynb.
+    chunks = list(iter_session(filename, chunksize, usecols, decode_eeg, to_datetime))
+    if not chunks:
+        return pd.read_csv(filename, usecols=usecols)
+    return pd.concat(chunks, ignore_index=True)
+
+def index_path(filename):
+    return filename + INDEX_SUFFIX
+
+def build_index(filename, stride=INDEX_STRIDE):
+    # Enregistre (horodatage, position en octets) toutes les `stride` lignes.
+    # Les lignes sont écrites en ordre chronologique, l'index est donc trié.
+    timestamps = []
+    offsets = []
+    with open(filename, 'rb') as file:
+        header = file.readline()
+        columns = header.decode('utf-8').strip().split(',')
+        if columns[0] != 'timestamp':
+            raise ValueError(f"{filename} : la première colonne doit être 'timestamp'.")
+        offset = file.tell()
+        row = 0
+        for line in file:
+            if row % stride == 0 and line.strip():
+                timestamps.append(float(line.split(b',', 1)[0]))
+                offsets.append(offset)
+            offset += len(line)
+            row += 1
+    stat = os.stat(filename)
+    np.savez(
+        index_path(filename),
+        timestamps=np.array(timestamps, dtype=np.float64),
+        offsets=np.array(offsets, dtype=np.int64),
+        columns=np.array(columns),
+        source=np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64),
+    )
+    return load_index(filename)
+
+def load_index(filename, rebuild=True):
+    # Charge l'index annexe, et le reconstruit s'il est absent ou périmé.
+    path = index_path(filename)
+    stat = os.stat(filename)
+    if os.path.exists(path):
+        with np.load(path) as index:
+            source = index['source']
+            if source[0] == stat.st_size and source[1] == stat.st_mtime_ns:
+                return {key: index[key] for key in ('timestamps', 'offsets', 'columns')}
+    if not rebuild:
+        raise FileNotFoundError(f"Index absent ou périmé pour {filename}")
+    return build_index(filename)
+
+def _filter_time_range(reader, start, end, decode_eeg, to_datetime):
+    # Garde les lignes de chaque bloc comprises dans [start, end] ; s'arrête au
+    # premier bloc qui dépasse `end` puisque le fichier est trié.
+    chunks = []
+    for chunk in reader:
+        mask = np.ones(len(chunk), dtype=bool)
+        if start is not None:
+            mask &= chunk['timestamp'].to_numpy() >= start
+        if end is not None:
+            mask &= chunk['timestamp'].to_numpy() <= end
+        done = end is not None and len(chunk) > 0 and chunk['timestamp'].iloc[-1] > end
+        chunk = chunk[mask]
+        if len(chunk):
+            chunks.append(_prepare_chunk(chunk.copy(), decode_eeg, to_datetime))
+        if done:
+            break
+    return chunks
+
+def read_time_range(filename, start=None, end=None, usecols=None, decode_eeg=True,
+                    to_datetime=True, chunksize=CHUNK_SIZE):
+    # Lit uniquement les lignes dont l'horodatage (en secondes) est dans [start, end].
+    # Une recherche dichotomique dans l'index donne la position de départ dans le fichier.
+    index = load_index(filename)
+    columns = [str(c) for c in index['columns']]
+    timestamps = index['timestamps']
+    offsets = index['offsets']
+    if usecols is not None:
+        usecols = [c for c in columns if c == 'timestamp' or c in usecols]
+
+    if len(offsets) == 0:
+        reader = pd.read_csv(filename, usecols=usecols, chunksize=chunksize)
+        chunks = _filter_time_range(reader, start, end, decode_eeg, to_datetime)
+    else:
+        position = 0
+        if start is not None:
+            position = max(np.searchsorted(timestamps, start, side='left') - 1, 0)
+        with open(filename, 'rb') as file:
+            file.seek(offsets[position])
+            reader = pd.read_csv(file, header=None, names=columns, usecols=usecols, chunksize=chunksize)
+            chunks = _filter_time_range(reader, start, end, decode_eeg, to_datetime)
+    if not chunks:
+        return pd.DataFrame(columns=usecols if usecols is not None else columns)
+    return pd.concat(chunks, ignore_index=True)
+
+def _parquet_schema(pa, columns):
+    # Schéma fixé à partir de l'en-tête : pandas choisit les types bloc par bloc
+    # (int64 devient float64 dès qu'une valeur manque), le fichier doit rester cohérent.
+    fields = []
+    for name in columns:
+        if name == EEG_COLUMN:
+            fields.append(pa.field(name, pa.large_list(pa.float32())))
+        elif name in TEXT_COLUMNS:
+            fields.append(pa.field(name, pa.string()))
+        else:
+            fields.append(pa.field(name, pa.float64()))
+    return pa.schema(fields)
+
+def convert_to_parquet(filename, output=None, chunksize=CHUNK_SIZE):
+    # Convertit une session CSV en Parquet ; eeg_pure devient une colonne large_list<float32>
+    # (positions en int64, un bloc peut dépasser 2**31 échantillons).
+    # Le fichier est écrit sous un nom temporaire puis renommé une fois complet.
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow est nécessaire pour la conversion en Parquet (pip install pyarrow).")
+
+    if output is None:
+        output = os.path.splitext(filename)[0] + '.parquet'
+    columns = list(pd.read_csv(filename, nrows=0).columns)
+    schema = _parquet_schema(pa, columns)
+    dtype = {name: (str if name in TEXT_COLUMNS else np.float64) for name in columns}
+    # Nom temporaire propre à chaque conversion, dans le dossier de destination
+    # pour que os.replace reste atomique.
+    descriptor, temporary = tempfile.mkstemp(
+        prefix=os.path.basename(output) + '.', suffix='.tmp', dir=os.path.dirname(output) or '.')
+    os.close(descriptor)
+    try:
+        with pq.ParquetWriter(temporary, schema) as writer:
+            for chunk in pd.read_csv(filename, chunksize=chunksize, dtype=dtype):
+                arrays = []
+                for field in schema:
+                    if field.name == EEG_COLUMN:
+                        values, offsets = decode_eeg_pure(chunk[field.name])
+                        arrays.append(pa.LargeListArray.from_arrays(
+                            pa.array(offsets), pa.array(values.astype(np.float32))))
+                    else:
+                        arrays.append(pa.array(chunk[field.name], type=field.type, from_pandas=True))
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        os.replace(temporary, output)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return output
+
+def convert_archive(filenames, output_dir=None, workers=None):
+    # Convertit plusieurs sessions en parallèle (un processus par fichier).
+    # Renvoie (fichiers convertis, erreurs) : un fichier en échec n'arrête pas les autres.
+    # Les fichiers qui produiraient le même Parquet (même nom dans deux dossiers)
+    # sont refusés avant de lancer les conversions.
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    outputs = {}
+    for filename in filenames:
+        if output_dir is None:
+            output = os.path.splitext(filename)[0] + '.parquet'
+        else:
+            name = os.path.splitext(os.path.basename(filename))[0] + '.parquet'
+            output = os.path.join(output_dir, name)
+        outputs[filename] = output
+    targets = {}
+    for filename, output in outputs.items():
+        targets.setdefault(os.path.abspath(output), []).append(filename)
+
+    converted = {}
+    failed = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for filename, output in outputs.items():
+            sources = targets[os.path.abspath(output)]
+            if len(sources) > 1:
+                failed[filename] = ValueError(
+                    f"{output} serait produit par plusieurs fichiers : {', '.join(sources)}")
+                continue
+            futures[executor.submit(convert_to_parquet, filename, output)] = filename
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                converted[filename] = future.result()
+            except Exception as err:
+                failed[filename] = err
+    return converted, failed
+
+def read_parquet_range(filename, start=None, end=None, columns=None, to_datetime=True):
+    # Lecture colonne par colonne d'une session convertie, filtrée par horodatage.
+    import pyarrow.parquet as pq
+
+    filters = []
+    if start is not None:
+        filters.append(('timestamp', '>=', start))
+    if end is not None:
+        filters.append(('timestamp', '<=', end))
+    if columns is not None and 'timestamp' not in columns:
+        columns = ['timestamp'] + list(columns)
+    table = pq.read_table(filename, columns=columns, filters=filters or None)
+    df = table.to_pandas()
+    if to_datetime and 'timestamp' in df.columns:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+    return df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indexe ou convertit des sessions CSV en Parquet.")
+    parser.add_argument('files', nargs='+', help="Fichiers CSV de session")
+    parser.add_argument('--index', action='store_true', help="Construire uniquement l'index d'horodatage")
+    parser.add_argument('--output-dir', default=None, help="Dossier de sortie des fichiers Parquet")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus")
+    args = parser.parse_args()
+
+    if args.index:
+        for filename in args.files:
+            index = build_index(filename)
+            print(f"{filename} : {len(index['offsets'])} entrées d'index")
+        sys.exit(0)
+
+    converted, failed = convert_archive(args.files, args.output_dir, args.workers)
+    for filename in args.files:
+        if filename in converted:
+            print(f"Converti : {converted[filename]}")
+        else:
+            print(f"Échec : {filename} : {failed[filename]}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
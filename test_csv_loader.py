@@ -0,0 +1,186 @@
+import os
+import ast
+import csv
+import numpy as np
+import pandas as pd
+import pytest
+
+import csv_loader
+
+pyarrow = pytest.importorskip('pyarrow')
+
+# Mêmes colonnes que web_app.CSVWriter
+FIELDNAMES = ['timestamp', 'eeg_pure', 'low_alpha', 'med_alpha', 'high_alpha', 'low_beta', 'med_beta', 'high_beta', 'delta', 'theta', 'alpha', 'beta', 'brain_state']
+STATES = ['Relaxation', 'Somnolence', 'Calme', 'Concentration']
+
+def make_row(i):
+    # Horodatages répétés par trois pour tester les égalités aux bornes de l'index.
+    # Une ligne sur cinq a un eeg_pure vide, les autres ont des tailles variables.
+    eeg = [] if i % 5 == 0 else [float(i + k) / 2 for k in range(4 + i % 3)]
+    row = {name: i % 7 for name in FIELDNAMES}
+    row['timestamp'] = 1000.0 + (i // 3) * 0.05
+    row['eeg_pure'] = eeg
+    row['delta'] = i * 0.25
+    row['brain_state'] = STATES[i % len(STATES)]
+    return row
+
+def write_session(filename, n_rows, truncated=True, first_row=0):
+    mode = 'w' if first_row == 0 else 'a'
+    with open(filename, mode=mode, newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
+        if first_row == 0:
+            writer.writeheader()
+        for i in range(first_row, first_row + n_rows):
+            writer.writerow(make_row(i))
+        if truncated:
+            # Enregistrement interrompu : la dernière ligne est incomplète.
+            file.write(f'{1000.0 + (first_row + n_rows) // 3 * 0.05},"[1.0, 2.0]",3,3\r\n')
+
+def reference(filename):
+    df = pd.read_csv(filename)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+    return df
+
+def literal_eeg(series):
+    return [np.array(ast.literal_eval(cell) if isinstance(cell, str) else [], dtype=float) for cell in series]
+
+def assert_same_session(result, expected):
+    assert len(result) == len(expected)
+    for got, want in zip(result['eeg_pure'], literal_eeg(expected['eeg_pure'])):
+        np.testing.assert_allclose(np.asarray(got, dtype=float), want, rtol=1e-6)
+    pd.testing.assert_frame_equal(
+        result.drop(columns='eeg_pure').reset_index(drop=True),
+        expected.drop(columns='eeg_pure').reset_index(drop=True),
+        check_dtype=False,
+    )
+
+@pytest.fixture
+def session(tmp_path):
+    filename = str(tmp_path / 'nia_data.csv')
+    write_session(filename, 100)
+    return filename
+
+def test_decode_eeg_pure_matches_literal_eval():
+    series = pd.Series(['[1, 2, 3]', '[]', np.nan, '[4.5]', '[-1.0, 2e3]'])
+    values, offsets = csv_loader.decode_eeg_pure(series)
+    decoded = np.split(values, offsets[1:-1])
+    for got, want in zip(decoded, literal_eeg(series)):
+        np.testing.assert_array_equal(got, want)
+
+def test_eeg_pure_to_array_uniform_rows():
+    array = csv_loader.eeg_pure_to_array(pd.Series(['[1, 2]', '[3, 4]']))
+    np.testing.assert_array_equal(array, [[1, 2], [3, 4]])
+
+@pytest.mark.parametrize('chunksize', [7, 50000])
+def test_load_session_matches_read_csv(session, chunksize):
+    assert_same_session(csv_loader.load_session(session, chunksize=chunksize), reference(session))
+
+@pytest.mark.parametrize('start,end', [
+    (None, None),
+    (1000.0, 1000.5),
+    (1000.0 + 4 * 0.05, 1000.0 + 4 * 0.05),  # lignes 12 à 14, l'index pointe sur la ligne 14
+    (1000.4, None),
+    (None, 1000.1),
+    (1001.6, 1001.7),  # contient la ligne tronquée
+    (2000.0, 3000.0),  # après la fin du fichier
+])
+def test_read_time_range_matches_filtered_read(session, start, end):
+    csv_loader.build_index(session, stride=7)
+    expected = pd.read_csv(session)
+    mask = np.ones(len(expected), dtype=bool)
+    if start is not None:
+        mask &= expected['timestamp'] >= start
+    if end is not None:
+        mask &= expected['timestamp'] <= end
+    expected = expected[mask]
+    expected['timestamp'] = pd.to_datetime(expected['timestamp'], unit='s')
+
+    result = csv_loader.read_time_range(session, start, end, chunksize=5)
+    if len(expected) == 0:
+        assert len(result) == 0
+    else:
+        assert_same_session(result, expected)
+
+def test_read_time_range_rebuilds_missing_or_stale_index(session):
+    assert not os.path.exists(csv_loader.index_path(session))
+    assert len(csv_loader.read_time_range(session, 1000.0, None)) == 101
+
+    os.remove(session)
+    write_session(session, 100, truncated=False)
+    write_session(session, 50, truncated=False, first_row=100)
+    result = csv_loader.read_time_range(session, 1002.0, None)
+    assert len(result) == 150 - 120
+
+@pytest.mark.parametrize('chunksize', [7, 700, 50000])
+def test_parquet_round_trip(session, tmp_path, chunksize):
+    output = csv_loader.convert_to_parquet(session, str(tmp_path / 'nia_data.parquet'), chunksize=chunksize)
+    assert_same_session(csv_loader.read_parquet_range(output), reference(session))
+
+    expected = reference(session)
+    window = (expected['timestamp'] >= pd.to_datetime(1000.35, unit='s')) & (expected['timestamp'] <= pd.to_datetime(1000.5, unit='s'))
+    result = csv_loader.read_parquet_range(output, 1000.35, 1000.5)
+    assert_same_session(result, expected[window])
+
+def test_failed_conversion_leaves_no_file(tmp_path):
+    filename = str(tmp_path / 'broken.csv')
+    write_session(filename, 20)
+    with open(filename, 'a', newline='') as file:
+        file.write('pas_un_nombre,"[1.0]",1,1,1,1,1,1,1,1,1,1,Calme\r\n')
+    with pytest.raises(ValueError):
+        csv_loader.convert_to_parquet(filename, chunksize=7)
+    assert os.listdir(tmp_path) == ['broken.csv']
+
+def test_convert_archive_reports_each_file(session, tmp_path):
+    broken = str(tmp_path / 'broken.csv')
+    with open(broken, 'w') as file:
+        file.write('timestamp,eeg_pure\nabc,"[1.0]"\n')
+    output_dir = str(tmp_path / 'parquet')
+    converted, failed = csv_loader.convert_archive([session, broken], output_dir, workers=2)
+    assert converted == {session: os.path.join(output_dir, 'nia_data.parquet')}
+    assert list(failed) == [broken]
+    assert os.listdir(output_dir) == ['nia_data.parquet']
+
+def test_convert_archive_refuses_same_basename(tmp_path):
+    sources = []
+    for folder in ('a', 'b'):
+        os.makedirs(tmp_path / folder)
+        sources.append(str(tmp_path / folder / 's.csv'))
+        write_session(sources[-1], 30)
+    other = str(tmp_path / 'autre.csv')
+    write_session(other, 30)
+    output_dir = str(tmp_path / 'parquet')
+    converted, failed = csv_loader.convert_archive(sources + [other], output_dir, workers=3)
+    assert list(converted) == [other]
+    assert sorted(failed) == sorted(sources)
+    assert os.listdir(output_dir) == ['autre.parquet']
+    assert_same_session(csv_loader.read_parquet_range(converted[other]), reference(other))
+
+def test_header_only_session(tmp_path):
+    filename = str(tmp_path / 'vide.csv')
+    write_session(filename, 0, truncated=False)
+    expected = pd.read_csv(filename)
+    assert list(csv_loader.load_session(filename).columns) == list(expected.columns)
+    assert len(csv_loader.load_session(filename)) == 0
+    assert len(csv_loader.read_time_range(filename, 1000.0, 2000.0)) == 0
+    assert len(csv_loader.eeg_pure_to_array(pd.Series([], dtype=object))) == 0
+    output = csv_loader.convert_to_parquet(filename)
+    assert len(csv_loader.read_parquet_range(output)) == 0
+
+def test_read_time_range_same_result_without_index_entries(session, tmp_path):
+    # Une ligne vide après l'en-tête : l'index ne contient aucune entrée et la
+    # lecture passe par le parcours complet du fichier.
+    unindexed = str(tmp_path / 'sans_index.csv')
+    with open(session) as source, open(unindexed, 'w', newline='') as file:
+        lines = source.readlines()
+        file.write(lines[0] + '\n' + ''.join(lines[1:]))
+    assert len(csv_loader.load_index(unindexed)['offsets']) == 0
+
+    expected = csv_loader.read_time_range(session, 1000.2, 1000.5, usecols=['delta'])
+    result = csv_loader.read_time_range(unindexed, 1000.2, 1000.5, usecols=['delta'])
+    assert list(result.columns) == ['timestamp', 'delta']
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_parquet_eeg_column_uses_int64_offsets(session, tmp_path):
+    import pyarrow.parquet as pq
+    output = csv_loader.convert_to_parquet(session, str(tmp_path / 'nia_data.parquet'))
+    assert pq.read_schema(output).field('eeg_pure').type == pyarrow.large_list(pyarrow.float32())